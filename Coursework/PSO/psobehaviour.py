@@ -20,6 +20,7 @@ class FitnessLoc:
         :param fitness: A value indicating the fitness of the location
         :type fitness: float
     """
+    __slots__ = ('location', 'fitness')
 
     def __init__(self, location, fitness):
         self.location = location
@@ -119,9 +120,10 @@ class TerminationPolicyManager:
 
         if estimates == []:
             return 0
-        estimate = max(estimates) - self.last_estimate
-        self.last_estimate = max(estimates)
-        return round(estimate, 2)
+        # only count the rounded step as reported so small steps accumulate rather than being lost
+        estimate = round(max(estimates) - self.last_estimate, 2)
+        self.last_estimate += estimate
+        return estimate
 
     def next_iteration(self, fitness_delta=None):
         """Step the termination policy manager forward
@@ -1,12 +1,67 @@
 from datetime import timedelta
+import math
+import multiprocessing
 import numpy as np
-import random
-import copy
 from tqdm.autonotebook import tqdm
 from .interface import Optimisable
 from .psobehaviour import FitnessLoc, TerminationPolicyManager, TerminationPolicy, BoundaryPolicy
 
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
 all_term_policy = [TerminationPolicy.ITERATIONS, TerminationPolicy.CONVERGENCE, TerminationPolicy.DURATION]
+
+
+def array_module(device):
+    """The array library used to hold the swarm on a device, cupy is only imported when it is needed
+
+    :param device: Either 'cpu' or 'cuda'
+    :type device: str
+    :raises ValueError: When the device is not recognised
+    :return: numpy for 'cpu', cupy for 'cuda'
+    :rtype: module
+    """
+    if device == 'cpu':
+        return np
+    if device == 'cuda':
+        import cupy
+        return cupy
+    raise ValueError('Invalid device, expected cpu or cuda')
+
+
+# The fitness function of a pool worker, sent once when the worker starts rather than with every task
+_worker_fitness_fn = None
+
+
+def _init_worker(fitness_fn):
+    global _worker_fitness_fn
+    _worker_fitness_fn = fitness_fn
+
+
+def _worker_fitness(position):
+    return _worker_fitness_fn(position)
+
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True)
+    def _fused_velocity(vel, pos, pbest, ibest, gbest, alpha, b, c, d, epsilon, active, out):
+        # Single pass velocity update and move, only used when numba is installed
+        # The velocity of each active particle is updated in place and out receives the new positions before any boundary policy is applied
+        for i in prange(vel.shape[0]):
+            if active[i]:
+                for j in range(vel.shape[1]):
+                    p = pos[i, j]
+                    v = alpha*vel[i, j] + b[i, j]*(pbest[i, j] - p) + c[i, j]*(ibest[i, j] - p) + d[i, j]*(gbest[j] - p)
+                    vel[i, j] = v
+                    out[i, j] = p + epsilon*v
+            else:
+                for j in range(vel.shape[1]):
+                    out[i, j] = pos[i, j]
+else:
+    _fused_velocity = None
+
 class PSO(Optimisable):
     """Particle Swarm Optimiser
 
@@ -34,9 +89,22 @@ class PSO(Optimisable):
     :type termination_args: dict, optional
     :param verbose: Print output, defaults to False
     :type verbose: bool, optional
+    :param num_runs: Number of searches averaged when PSO itself is being optimised, defaults to 1
+    :type num_runs: int, optional
+    :param seed: Seed for the random number generator, defaults to None
+    :type seed: int, optional
+    :param n_jobs: Number of processes used to evaluate the fitness function, defaults to 1. When greater than 1 the workers are spawned rather than forked, so the fitness function must be picklable and importable by a fresh interpreter (functions and classes defined in a notebook are not), and anything it records is lost with the worker process
+    :type n_jobs: int, optional
+    :param progress_every: Number of iterations between progress bar updates when verbose, the bar is also updated whenever the best fitness improves, defaults to 100
+    :type progress_every: int, optional
+    :param device: Where the swarm is held and updated, 'cpu' or 'cuda' (requires cupy), defaults to 'cpu'. On 'cuda' a batch fitness function receives and may return cupy arrays
+    :type device: str, optional
+    :param dtype: Floating point type of the positions and velocities, either numpy.float32 or numpy.float64, defaults to numpy.float32
+    :type dtype: numpy.dtype, optional
+    :raises ValueError: When dtype is not float32 or float64
     """
 
-    def __init__(self, swarm_size=10, num_informants=6, bound=(1, -1), alpha=0.1, beta=1.3, gamma=1.4, delta=1.3, epsilon=0.1,  boundary_policy=BoundaryPolicy.RANDOMREINIT, termination_policy=[TerminationPolicy.ITERATIONS], termination_args={'max_iter': int(1e6), 'time_delta': timedelta(minutes=4), 'min_fitness_delta': 0}, verbose=True, num_runs=1):
+    def __init__(self, swarm_size=10, num_informants=6, bound=(1, -1), alpha=0.1, beta=1.3, gamma=1.4, delta=1.3, epsilon=0.1,  boundary_policy=BoundaryPolicy.RANDOMREINIT, termination_policy=[TerminationPolicy.ITERATIONS], termination_args={'max_iter': int(1e6), 'time_delta': timedelta(minutes=4), 'min_fitness_delta': 0}, verbose=True, num_runs=1, seed=None, n_jobs=1, progress_every=100, device='cpu', dtype=np.float32):
         #! Currently BoundaryPolicy.BOUNCE, TerminationPolicy.DURATION and TerminationPolicy.CONVERGENCE are not implemented
         self.swarm_size = swarm_size
         self.boundary = bound
@@ -52,14 +120,43 @@ class PSO(Optimisable):
 
         self.search_dimension = None
         self.search_dimension_set = False
-        self.best = None
-        self.previous_best = FitnessLoc([], -999999.0)
-        self.particles = None
+        # Best location and fitness found by the swarm, and the best fitness before the last improvement
+        self.best_loc = None
+        self.best_fit = -np.inf
+        self.prev_best_fit = -np.inf
         self.num_informants = num_informants
 
+        # Swarm state, one row per particle (see _instantiate_particles)
+        self.pos = None
+        self.vel = None
+        self.pbest_loc = None
+        self.pbest_fit = None
+        self.fitness = None
+        self.informant_idx = None
+        self.active = None
+        self.lo = None
+        self.hi = None
+        self.uniform_bounds = False
+        # the bounds used by the boundary checks, either two floats or lo and hi (see set_search_dimensions)
+        self._bound_lo = None
+        self._bound_hi = None
+
         self.fitness_fn = None # The arg to this is the shape of the ANN (wieghts + activation)
+        self.fitness_fn_batch = None # As above but called with every particle position at once
         self.num_runs = num_runs
         self.verbose = verbose
+        self.progress_every = max(1, int(progress_every))
+        self.seed = seed
+        self.n_jobs = n_jobs
+        self._pool = None
+        self.device = device
+        self._xp = array_module(device)
+        # the random generators only produce float32 and float64
+        if np.dtype(dtype) not in (np.float32, np.float64):
+            raise ValueError('Invalid dtype, expected numpy.float32 or numpy.float64')
+        self.dtype = dtype
+        self.rng = self.xp.random.default_rng(seed)
+        self.swarm_reset = False
 
 
     def set_fitness_fn(self, fitness_function):
@@ -72,6 +169,15 @@ class PSO(Optimisable):
         #print(fitness_function)
 
 
+    def set_fitness_fn_batch(self, fitness_function):
+        """Specify a function to calculate the fitness score of the whole swarm in one call, used in place of the function given to set_fitness_fn
+
+        :param fitness_function: a function object that can assess the fitness of each row of a matrix of positions, the matrix is updated in place so copy it if it needs to be kept
+        :type fitness_function: numpy.ndarray -> numpy.array
+        """
+        self.fitness_fn_batch = fitness_function
+
+
     def set_search_dimensions(self, dimensions):
         """Specify the dimensionality of the search
 
@@ -91,150 +197,308 @@ class PSO(Optimisable):
             self.search_dimension_set = False
             raise ValueError("Invalid dimensions parameter")
 
+        # lower and upper bound of each dimension
+        self.lo = self.xp.asarray([d[0] for d in self.search_dimension], dtype=self.dtype)
+        self.hi = self.xp.asarray([d[1] for d in self.search_dimension], dtype=self.dtype)
+
+        # when every dimension shares the same bounds they are kept as two floats for the boundary checks
+        self.uniform_bounds = len(self.search_dimension) > 0 and bool((self.lo == self.lo[0]).all() and (self.hi == self.hi[0]).all())
+        if self.uniform_bounds:
+            self._bound_lo, self._bound_hi = float(self.search_dimension[0][0]), float(self.search_dimension[0][1])
+        else:
+            self._bound_lo, self._bound_hi = self.lo, self.hi
         self.search_dimension_set = True
         
 
-    def run(self):
-        """Begin Particle Swarm Optimisation - Search dimensions must have been specified
+    @property
+    def xp(self):
+        """The array module (numpy or cupy) the swarm arrays belong to
+        """
+        return self._xp
+
+
+    def __getstate__(self):
+        # modules cannot be pickled, the array module is looked up again from the device when unpickled
+        state = self.__dict__.copy()
+        del state['_xp']
+        return state
+
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._xp = array_module(self.device)
+
+
+    @property
+    def best(self):
+        """The best location and fitness found by the swarm
+
+        :return: A copy of the best location with its fitness, the fitness is -inf if no finite fitness has been recorded since the swarm was last reset. None before the swarm is first reset or run
+        :rtype: FitnessLoc
+        """
+        if self.best_loc is None:
+            return None
+        return FitnessLoc(self._to_host(self.best_loc), self.best_fit)
+
+
+    def reset(self, seed=None):
+        """Reinitialise the swarm ready for a new search, the swarm arrays are reused unless the swarm size or search dimensions have changed
+
+        :param seed: Seed for a new random number generator, defaults to None which keeps the current generator
+        :type seed: int, optional
+        :raises ValueError: When the search dimensions or fitness function have not been specified
         """
         if not self.search_dimension_set:
             raise ValueError('Search dimentions have not yet been specified')
-        self._instantiate_particles()
-        self.best = FitnessLoc([], -9999.0)
+        if self.fitness_fn is None and self.fitness_fn_batch is None:
+            raise ValueError('No fitness function defined')
 
-        controller = TerminationPolicyManager(TerminationPolicy.ITERATIONS, **self.termination_args)
+        if seed is not None:
+            self.rng = self.xp.random.default_rng(seed)
 
-        if self.verbose:
-            pbar = tqdm(total=100, position=0, leave=True, desc='Fitness: {}'.format(self.best.fitness))
+        if self.pos is None or self.pos.shape != (self.swarm_size, len(self.search_dimension)):
+            self._instantiate_particles()
 
-        while not controller.terminate:
-            # Update best and personal fitness values based on the current positions
-            # only iterate through particles that will move, thus continue if all velocities of a given particle are 0
-            self._pso_assess_fitness()
+        self.pos[:] = self._init_position()
+        self.vel[:] = self._init_velocity()
+        self.pbest_loc[:] = self.pos
+        self.pbest_fit[:] = -np.inf
+        self.fitness[:] = -np.inf
+        self._init_informants()
 
-            # Update the informant fitness and velocity of all particles
-            self._update_particle()
+        # the global best starts at a real position until the first fitness is recorded
+        self.xp.copyto(self.best_loc, self.pos[0])
+        self.best_fit = -np.inf
+        self.prev_best_fit = -np.inf
+        self.swarm_reset = True
 
-            # Move the particles based on their velocity
-            self._move_particles()
 
-            fitness_delta = (self.best.fitness - self.previous_best.fitness)
+    def run(self):
+        """Begin Particle Swarm Optimisation - Search dimensions must have been specified
 
-            if self.verbose:
-                pbar.update(controller.estimate_progress()*100)
-                pbar.set_description(
-                    desc='Fitness: {}'.format(self.best.fitness), refresh=True)
+        :return: The best location and fitness found
+        :rtype: FitnessLoc
+        """
+        # start from a fresh swarm unless reset() has been called since the last run
+        if not self.swarm_reset:
+            self.reset()
+        self.swarm_reset = False
 
-            
-            controller.next_iteration(fitness_delta=fitness_delta)
+        controller = TerminationPolicyManager(TerminationPolicy.ITERATIONS, **self.termination_args)
 
         if self.verbose:
+            pbar = tqdm(total=100, position=0, leave=True, desc='Fitness: {}'.format(self.best_fit))
+
+        # a batch fitness function never uses the pool
+        if self.n_jobs > 1 and self.fitness_fn_batch is None:
+            # spawned rather than forked, forking once numba has started its threads anywhere in the process can hang
+            self._pool = multiprocessing.get_context('spawn').Pool(self.n_jobs, initializer=_init_worker, initargs=(self.fitness_fn,))
+
+        try:
+            last_best_fit = self.best_fit
+            while not controller.terminate:
+                self._step()
+
+                fitness_delta = (self.best_fit - self.prev_best_fit)
+
+                # only redraw the progress bar periodically or when the best fitness improves
+                if self.verbose and (controller.current_iter % self.progress_every == 0 or self.best_fit > last_best_fit):
+                    pbar.update(controller.estimate_progress()*100)
+                    pbar.set_description(
+                        desc='Fitness: {}'.format(self.best_fit), refresh=False)
+                last_best_fit = self.best_fit
+
+                controller.next_iteration(fitness_delta=fitness_delta)
+        finally:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool.join()
+                self._pool = None
+
+        if self.verbose:
+            pbar.update(controller.estimate_progress()*100)
+            pbar.set_description(
+                desc='Fitness: {}'.format(self.best_fit), refresh=False)
+            pbar.refresh()
             pbar.close()
 
         #print('Iteration: ', controller.current_iter)
-        #print('Fitness: ', self.best.fitness)
+        #print('Fitness: ', self.best_fit)
         return self.best
 
-    def _pso_assess_fitness(self):
-        # evaluate and update fitness for each particle at current location 
-        # Particle class: self.fitness should be updated here
-        # update best
+    def _step(self):
+        # One iteration over the swarm arrays
+        # only particles that will move are updated, thus ignore any particle whose velocities are all 0
+        self.active = self.xp.any(self.vel != 0, axis=1)
+
+        # Evaluate the swarm and update best and personal fitness values based on the current positions
+        self._pso_assess_fitness()
 
-        for particle in self.particles:
-            if not any(particle.velocity != 0):
-               continue
+        # Update the velocity of all particles from their personal, informant and global bests, and find where they move to
+        self._update_particle()
 
-            fitness = particle.assess_fitness()
+        # Apply the boundary policy and move the particles
+        self._move_particles()
+
+    def _pso_assess_fitness(self):
+        # evaluate and update fitness for each particle at current location 
+        # update personal bests and best
+        xp = self.xp
+        active = self.active
+        fits = self._evaluate_swarm(self.pos)
+
+        self.fitness[active] = fits[active]
+
+        improved = active & (fits > self.pbest_fit)
+        self.pbest_loc[improved] = self.pos[improved]
+        self.pbest_fit[improved] = fits[improved]
+
+        # NaN fitness values are ignored so they cannot hide an improvement elsewhere in the swarm
+        # inactive and NaN particles are -inf so can never improve on best_fit
+        masked = xp.where(active & ~xp.isnan(fits), fits, -np.inf)
+        k = xp.argmax(masked)
+        # a single transfer of the best fitness back to the host
+        fit = float(masked[k])
+        if fit > self.best_fit:
+            self.prev_best_fit = self.best_fit
+            self.best_fit = fit
+            xp.copyto(self.best_loc, self.pos[k])
+
+    def _evaluate_swarm(self, positions):
+        # fitness of every row in positions, falls back to calling fitness_fn once per particle
+        if self.fitness_fn_batch is not None:
+            return self.xp.asarray(self.fitness_fn_batch(positions), dtype=float)
+        # positions are updated in place, copy them so the fitness function can keep hold of the vectors it is given
+        # and hand them over in double precision whatever the swarm dtype
+        if self.xp is np:
+            positions = list(positions.astype(np.float64))
+        else:
+            positions = list(self.xp.asnumpy(positions).astype(np.float64, copy=False))
+        if self._pool is not None:
+            # only the position vectors go to the workers, in one chunk per worker, and only the fitness values come back
+            chunksize = math.ceil(len(positions)/self.n_jobs)
+            return self.xp.asarray(self._pool.map(_worker_fitness, positions, chunksize=chunksize), dtype=float)
+        return self.xp.asarray([self.fitness_fn(position) for position in positions], dtype=float)
 
-            if self.best is None or fitness > self.best:
-                self.previous_best = copy.deepcopy(self.best)
-                self.best = copy.deepcopy(fitness)
+    def _to_host(self, a):
+        # a numpy copy of a swarm array
+        if self.xp is np:
+            return a.copy()
+        return self.xp.asnumpy(a)
 
 
     def _update_particle(self):
-        #! Doesnt move yet (this is important because the position of each particle affect how they all get a new velocity)
+        #! Doesnt move yet, the new positions are written to _tmp_pos (this is important because the position of each particle affect how they all get a new velocity)
         # Its ok if the particles velocity would take it out of bounds, handle that in _move_particles()
-        # It would be nice to optimise this
-        for particle in self.particles:
-            velocity = copy.deepcopy(particle.velocity)
-            if not any(particle.velocity != 0):
-               continue
-            particle.velocity_list.append(velocity)
-            fittest_informant_loc = FitnessLoc([], -999999.0)
-            for informant in particle.informants:
-                if fittest_informant_loc < informant.fitness_loc:
-                    fittest_informant_loc = informant.fitness_loc
-
-            prev_fittest_loc = particle.personal_fittest_loc
-            prev_fittest_loc_informants = fittest_informant_loc
-            for i in range(len(self.search_dimension)):
-                b = random.uniform(0.0, self.beta)
-                c = random.uniform(0.0, self.gamma)
-                d = random.uniform(0.0, self.delta)
-                velocity[i] = self.alpha * velocity[i] + b*(prev_fittest_loc.location[i] - particle.position[i]) + c*(prev_fittest_loc_informants.location[i] - particle.position[i]) + d*(self.best.location[i] - particle.position[i])
-            particle.update_velocity(velocity)
+        # Every particle and dimension is updated at once over the swarm arrays
+        xp = self.xp
+        # random coefficients for every particle and dimension, drawn straight into a preallocated buffer
+        self.rng.random(self._coef.shape, dtype=self.dtype, out=self._coef)
+        B, C, Dr = self._coef
+        B *= self.beta
+        C *= self.gamma
+        Dr *= self.delta
+
+        # personal best location of the fittest informant of each particle
+        inf_fits = self.pbest_fit[self.informant_idx]
+        best_inf = xp.take_along_axis(self.informant_idx, inf_fits.argmax(axis=1)[:, None], axis=1)[:, 0]
+        ibest = xp.take(self.pbest_loc, best_inf, axis=0, out=self._ibest)
+
+        position = self._tmp_pos
+        if _fused_velocity is not None and xp is np:
+            # velocity update and move in a single pass
+            _fused_velocity(self.vel, self.pos, self.pbest_loc, ibest, self.best_loc, self.alpha, B, C, Dr, self.epsilon, self.active, position)
+            return
+
+        # the new velocity is built up in _scratch2, _scratch1 holds each term
+        velocity, term = self._scratch2, self._scratch1
+        xp.multiply(self.alpha, self.vel, out=velocity)
+        for coef, loc in ((B, self.pbest_loc), (C, ibest), (Dr, self.best_loc)):
+            xp.subtract(loc, self.pos, out=term)
+            xp.multiply(coef, term, out=term)
+            xp.add(velocity, term, out=velocity)
+        xp.copyto(self.vel, velocity, where=self.active[:, None])
+
+        xp.multiply(self.epsilon, self.vel, out=position)
+        xp.add(self.pos, position, out=position)
 
     def _move_particles(self):
-        for particle in self.particles:
-            if not any(particle.velocity != 0):
-               continue
+        # the unbounded new positions have already been written by _update_particle
+        xp = self.xp
+        position = self._tmp_pos
 
-            temp_position = particle.position + (self.epsilon*particle.velocity)
+        # if position not within boundaries use appropriate boundary policy
+        # else keep the new position
+        oob = (position < self._bound_lo) | (position > self._bound_hi)
+        if self.boundary_policy == BoundaryPolicy.BOUNCE:
+            # TODO Bounce is not yet implemented
+            if oob.any():
+                raise NotImplementedError
 
-            # if position not within boundaries use appropriate boundary policy
-            # else update particle position at dimension d
-            for index, d in enumerate(self.search_dimension):
-                if not (d[0] <= temp_position[index] <= d[1]):
-                    # TODO Bounce might be totally wrong, requires code review
-                    if self.boundary_policy == BoundaryPolicy.BOUNCE:
-                        raise NotImplementedError
-                        #! Bug below, self.boundary[index wont work]
-                        distance_left = temp_position[index] - self.boundary[index]
-                        temp_position[index] = self.boundary[index] - distance_left
+        elif self.boundary_policy == BoundaryPolicy.RANDOMREINIT:
+            if oob.any():
+                # drawn into the scratch buffer, which _update_particle has finished with
+                rand = self.rng.random(position.shape, dtype=self.dtype, out=self._scratch1)
+                rand *= self._bound_hi - self._bound_lo
+                rand += self._bound_lo
+                xp.copyto(position, rand, where=oob)
 
-                    elif self.boundary_policy == BoundaryPolicy.RANDOMREINIT:
-                        temp_position[index] = random.uniform(d[0], d[1])
+        # else - REFUSE, do nothing
+        elif self.boundary_policy == BoundaryPolicy.REFUSE:
+            xp.copyto(position, self.pos, where=oob)
 
-                    # else - REFUSE, do nothing
-                    elif self.boundary_policy == BoundaryPolicy.REFUSE:
-                        temp_position[index] = particle.position[index]
-            particle.update_position(temp_position)
+        xp.copyto(self.pos, position, where=self.active[:, None])
 
 
     def _instantiate_particles(self):
         #depends on set_search_dimensions
-        if self.fitness_fn is None:
-            raise ValueError('No fitness function defined')
-
-        self.particles = [Particle(self._init_position(), self._init_velocity(), self.fitness_fn) for _ in range(self.swarm_size)]
-        self._init_informants()
-
+        # The swarm is stored as one array per attribute, each row is a particle, values are set by reset()
+        xp = self.xp
+        S, D = self.swarm_size, len(self.search_dimension)
+        self.pos = xp.empty((S, D), dtype=self.dtype)
+        self.vel = xp.empty((S, D), dtype=self.dtype)
+        self.pbest_loc = xp.empty((S, D), dtype=self.dtype)
+        self.pbest_fit = xp.empty(S)
+        self.fitness = xp.empty(S)
+        self.best_loc = xp.empty(D, dtype=self.dtype)
+
+        # scratch buffers reused by every iteration of the velocity update and move
+        self._scratch1 = xp.empty_like(self.vel)
+        self._scratch2 = xp.empty_like(self.vel)
+        self._tmp_pos = xp.empty_like(self.pos)
+        self._coef = xp.empty((3, S, D), dtype=self.dtype)
+        self._ibest = xp.empty_like(self.pos)
 
 
     def _init_position(self):
         # Check the list in search_dimensions
-        # randomly initialise the position vector pointwise WITHIN the boundary of search_dimension list
-        # look at Particle class: Particle.position = new value
+        # randomly initialise the position of every particle pointwise WITHIN the boundary of search_dimension list
         #! returns a new value (see _instantiate_particles)
-        return np.array([random.uniform(d[0], d[1]) for d in self.search_dimension])
+        return self._uniform_in_bounds((self.swarm_size, len(self.search_dimension)))
 
 
     def _init_velocity(self):
         #! Not the same as _move_particle (no need to consider the boundary here)
-        # randomly initialise the velocity vector (depending on velocity init policy) pointwise for the size of search_dimension list
-        # look at Particle class: Particle.velocity = new value
+        # randomly initialise the velocity of every particle (depending on velocity init policy) pointwise for the size of search_dimension list
         #! returns a new value (see _instantiate_particles)
         # quick naive velocity solution, needs testing
-        return np.array([random.uniform(d[0], d[1]) for d in self.search_dimension])
+        return self._uniform_in_bounds((self.swarm_size, len(self.search_dimension)))
+
+
+    def _uniform_in_bounds(self, shape):
+        # lo + (hi - lo)*u rather than rng.uniform(lo, hi) so reversed bounds such as the default (1, -1) are still accepted
+        return self._bound_lo + (self._bound_hi - self._bound_lo)*self.rng.random(shape, dtype=self.dtype)
 
 
     def _init_informants(self):
         # choose how many n informants each particle will have (variable self.num_informants)
-        # assign randomly n informants to each particle
-        for particle in self.particles:
-            no_self = np.delete(np.array(self.particles),
-                                np.where(np.array(self.particles) == particle ))
-            particle.set_informants(np.random.choice(no_self, self.num_informants, replace=False))
+        # assign randomly n informants to each particle, stored as row indices into the swarm arrays
+        if self.num_informants >= self.swarm_size:
+            raise ValueError('Swarm is too small for the number of informants')
+        # a particle is never its own informant, its own key is always sorted last
+        rand = self.rng.random((self.swarm_size, self.swarm_size))
+        self.xp.fill_diagonal(rand, np.inf)
+        self.informant_idx = self.xp.argpartition(rand, self.num_informants - 1, axis=1)[:, :self.num_informants]
 
 
 
@@ -249,11 +513,12 @@ class PSO(Optimisable):
         :rtype: float
         """
         self.decode_vec(vec)
-        fitness_list = []
-        for _ in range(self.num_runs):
+        fitness_list = np.empty(self.num_runs)
+        for i in range(self.num_runs):
+            self.reset(None if self.seed is None else self.seed + i)
             self.run()
-            fitness_list.append(self.best.fitness)
-        return np.mean(fitness_list)
+            fitness_list[i] = self.best_fit
+        return fitness_list.mean()
 
     def decode_vec(self, vec):
         """Decode a vector to set the hyperparameters of the next search
@@ -261,13 +526,13 @@ class PSO(Optimisable):
         :param vec: A vector describing the hyperparameters of PSO
         :type vec: list(float)
         """
-        self.swarm_size = round(vec[0])
-        self.num_informants = round(vec[1])
-        self.alpha = vec[2]
-        self.beta = vec[3]
-        self.gamma = vec[4]
-        self.delta = vec[5]
-        self.epsilon = vec[6]
+        self.swarm_size = round(float(vec[0]))
+        self.num_informants = round(float(vec[1]))
+        self.alpha = float(vec[2])
+        self.beta = float(vec[3])
+        self.gamma = float(vec[4])
+        self.delta = float(vec[5])
+        self.epsilon = float(vec[6])
 
         return self
 
@@ -303,8 +568,6 @@ class Particle:
 
         self.personal_fittest_loc = None
         self.informat_fittest_loc = None
-        self.informants = None
-        self.velocity_list = []
 
     def update_position(self, new_position):
         """Updates particle's position
@@ -322,14 +585,6 @@ class Particle:
         """
         self.velocity = new_velocity
 
-    def set_informants(self, informants):
-        """Sets particle's informants
-
-        :param informants: List of particles that will be particle's informants 
-        :type informants: numpy.array
-        """
-        self.informants = informants
-
     def assess_fitness(self):
         """Assess the fitness of this particle
 
@@ -337,8 +592,7 @@ class Particle:
         :type fitness_fn: np.array -> float
         """
         # position describes the neural networks parameters
-        self.fitness_loc = FitnessLoc(copy.deepcopy(
-            self.position), self.fitness_fn(self.position))
+        self.fitness_loc = FitnessLoc(self.position.copy(), self.fitness_fn(self.position))
 
         if self.personal_fittest_loc is None:
             self.personal_fittest_loc = self.fitness_loc